@@ -24,7 +24,6 @@ import pickle
 import warnings
 import sys
 from contextlib import contextmanager
-from pathlib import Path
 from sqlite3.dbapi2 import Connection, Cursor, OperationalError
 from threading import local, get_ident
 from time import time as current, sleep
@@ -276,6 +275,8 @@ class PickleStore:
         self.protocol: int = protocol
         self.raw_max_size: int = raw_max_size
         self.charset: str = charset
+        # signatures of the missing files that have already been warned
+        self._warned: set = set()
 
     @staticmethod
     def signature(data: bytes) -> str:
@@ -301,7 +302,7 @@ class PickleStore:
             return sig, STRING
 
         # inf / float
-        if tp in (int, float):
+        if tp is int or tp is float:
             return data, NUMBER
 
         # bytes
@@ -331,7 +332,7 @@ class PickleStore:
             raw data
         """
 
-        if fmt in (RAW, NUMBER):
+        if fmt == RAW or fmt == NUMBER:
             return dump
         if fmt == PICKLE:
             if isinstance(dump, str):
@@ -359,13 +360,17 @@ class PickleStore:
             return None
         with open(file, 'wb') as fd:
             _ = fd.write(data)
+        self._warned.discard(sig)
 
     def read(self, sig: str) -> Optional[bytes]:
 
         file: str = op.join(self.directory, sig)
         # TODO: the value reference by many key(s)
         if not op.exists(file):
-            warnings.warn(f'stored file:{file} not found', Cache3Warning)
+            # warn once per file instead of on every read of the key
+            if sig not in self._warned:
+                self._warned.add(sig)
+                warnings.warn(f'stored file:{file} not found', Cache3Warning)
             return None
         with open(file, 'rb') as fd:
             return fd.read()
@@ -522,6 +527,9 @@ evict_manager: EvictManager = EvictManager({
 class DiskCache:
     """ Disk cache based on sqlite and file system """
 
+    # The data outlives the process and is shared with other processes
+    persistent: bool = True
+
     def __init__(   # pylint: disable=too-many-arguments
             self,
             directory: str = _default_directory,
@@ -594,29 +602,72 @@ class DiskCache:
 
         """
 
-        sk, kf = self.store.dumps(key)
         with self.sqlite.transact() as sql:
-            row = sql(
-                'SELECT `rowid`'
-                'FROM `cache`'
-                'WHERE `key` = ? AND `tag` IS ?',
-                (sk, tag)
-            ).fetchone()
-            sv, vf = self.store.dumps(value)
+            now: Time = current()
+            ok, created = self._set_row(sql, key, value, timeout, tag, now)
+            if created:
+                self.try_evict(sql, now)
+            return ok
 
-            # key existed but it is expired
-            if row:
-                (rowid, ) = row
-                if self._update_row(sql, rowid, sv, vf, timeout, tag):
-                    return True
-
-            # key not found in cache
-            else:
-                ok: bool = self._create_row(sql, sk, kf, sv, vf, timeout, tag)
-                if ok:
-                    self._add_count(sql)
-                    self.try_evict(sql)
-                return ok
+    def set_many(self, mapping: Dict[Any, Any], timeout: Time = None, tag: TG = None) -> bool:
+        """ Batch version of ``set``, all the items are written in a single
+        transaction, the eviction is tried whenever an insert fills the cache
+        (as ``set`` does), so the batch can't grow it beyond ``max_size``.
+
+        Args:
+            mapping: key-value relationships to be written
+            timeout: the same timeout for all the items
+            tag: the same tag for all the items
+
+        Returns:
+            True if all the items are written else False
+        """
+
+        ok: bool = True
+        with self.sqlite.transact() as sql:
+            now: Time = current()
+            length: int = len(self)
+            for key, value in mapping.items():
+                written, created = self._set_row(sql, key, value, timeout, tag, now)
+                ok = written and ok
+                if created:
+                    length += 1
+                    # the counter is only read back when the cache is full
+                    if length >= self.max_size:
+                        self.try_evict(sql, now)
+                        length = len(self)
+        return ok
+
+    # pylint: disable=too-many-arguments
+    def _set_row(
+            self, sql: QY, key: Any, value: Any, timeout: Time, tag: TG, now: Time
+    ) -> Tuple[bool, bool]:
+        """ Write the key-value relationship in the current transaction,
+        updating the existing row (even expired) or creating a new one.
+
+        Returns:
+            ok: whether the row is written
+            created: whether a new row is created (and counted)
+        """
+        sk, kf = self.store.dumps(key)
+        row: ROW = sql(
+            'SELECT `rowid`'
+            'FROM `cache`'
+            'WHERE `key` = ? AND `tag` IS ?',
+            (sk, tag)
+        ).fetchone()
+        sv, vf = self.store.dumps(value)
+
+        # key existed but it is expired
+        if row:
+            (rowid, ) = row
+            return self._update_row(sql, rowid, sv, vf, timeout, tag, now), False
+
+        # key not found in cache
+        ok: bool = self._create_row(sql, sk, kf, sv, vf, timeout, tag, now)
+        if ok:
+            self._add_count(sql)
+        return ok, ok
 
     def get(self, key: Any, default: Any = None, tag: TG = None) -> Any:
         """
@@ -666,21 +717,22 @@ class DiskCache:
             consistency of behavior
         """
 
+        # fetch all the keys in a single round-trip and let SQLite filter
+        # out the expired rows instead of checking them one by one.
         sks: List[Any] = [self.store.dumps(key)[0] for key in keys]
-        snap: str = str('?, ' * len(sks)).strip(', ')
+        snap: str = ', '.join('?' * len(sks))
         rs: Cursor = self.sqlite.session.execute(
-            'SELECT `key`, `value`, `vf` FROM `cache`'
-            f'WHERE `key` IN ({snap}) AND `tag` IS ? ',
-            (*sks, tag)
+            'SELECT `key`, `value`, `vf` FROM `cache` '
+            f'WHERE `key` IN ({snap}) AND `tag` IS ? '
+            'AND (`expire` IS NULL OR `expire` > ?)',
+            (*sks, tag, current())
         )
 
-        vs: dict = {sk: self.store.loads(sv, vf) for sk, sv, vf in rs}
-        result: dict = {}
-        for idx, key in enumerate(keys):
-            v = vs.get(sks[idx], empty)
-            if v is not empty:
-                result[key] = v
-        return result
+        loads: Callable[[Any, int], Any] = self.store.loads
+        vs: dict = {sk: (sv, vf) for sk, sv, vf in rs}
+        return {
+            key: loads(*vs[sk]) for key, sk in zip(keys, sks) if sk in vs
+        }
 
     def incr(self, key: Any, delta: Number = 1, tag: TG = None) -> Number:
         """ Increases the value by delta (default 1)
@@ -749,9 +801,11 @@ class DiskCache:
             'WHERE `key` = "count"'
         ).rowcount == 1
 
+    # pylint: disable=too-many-arguments
     @staticmethod
-    def _update_row(sql: QY, rowid: int, sv: Any, vf: int, timeout: Time, tag: TG) -> bool:
-        now: Time = current()
+    def _update_row(
+            sql: QY, rowid: int, sv: Any, vf: int, timeout: Time, tag: TG, now: Time
+    ) -> bool:
         expire: Time = get_expire(timeout, now)
         return sql(
             'UPDATE `cache` SET '
@@ -768,9 +822,9 @@ class DiskCache:
 
     # pylint: disable=too-many-arguments
     @staticmethod
-    def _create_row(sql: QY, sk: Any, kf: int, sv: Any, vf: int, timeout: Time, tag: TG) -> bool:
-
-        now: Time = current()
+    def _create_row(
+            sql: QY, sk: Any, kf: int, sv: Any, vf: int, timeout: Time, tag: TG, now: Time
+    ) -> bool:
         expire: Time = get_expire(timeout, now)
         return sql(
             'INSERT INTO `cache`('
@@ -800,6 +854,8 @@ class DiskCache:
 
     @cached_property
     def location(self) -> str:
+        # imported here to keep `import cache3` light
+        from pathlib import Path  # pylint: disable=import-outside-toplevel
         return (Path(self.directory) / self.name).as_posix()
 
     def ttl(self, key: Any, tag: TG = None) -> Time:
@@ -813,20 +869,21 @@ class DiskCache:
 
         """
         sk, _ = self.store.dumps(key)
+        now: Time = current()
         row: ROW = self.sqlite.session.execute(
             'SELECT `expire` '
             'FROM `cache` '
             'WHERE `key` = ? '
             'AND `tag` IS ? '
             'AND (`expire` IS NULL OR `expire` > ?)',
-            (sk, tag, current())
+            (sk, tag, now)
         ).fetchone()
         if not row:
             return -1
         (expire, ) = row
         if expire is None:
             return None
-        return expire - current()
+        return expire - now
 
     def delete(self, key: Any, tag: TG = None) -> bool:
         """
@@ -857,17 +914,15 @@ class DiskCache:
         """
 
         sk, _ = self.store.dumps(key)
-        cursor = self.sqlite.session.execute(
+        cursor: Cursor = self.sqlite.session.execute(
             'SELECT * '
             'FROM `cache` '
             'WHERE `key` = ? AND `tag` IS ?',
             (sk, tag)
         )
-        cursor.row_factory = lambda _cursor, _row: {
-            col[0]: _row[idx] for idx, col in enumerate(_cursor.description)
-        }
-        row: Optional[Dict[str, Any]] = cursor.fetchone()
-        if row:
+        line: ROW = cursor.fetchone()
+        if line:
+            row: Dict[str, Any] = dict(zip((col[0] for col in cursor.description), line))
             row['sk'] = row['key']
             row['key'] = self.store.loads(row['key'], row['kf'])
             row['sv'] = row['value']
@@ -914,7 +969,8 @@ class DiskCache:
         return value
 
     def flush_length(self, now: Time = None) -> None:
-        now = now or current()
+        if now is None:
+            now = current()
         self.sqlite.session.execute(
             'UPDATE `info` SET `value` = ('
             'SELECT COUNT(1) FROM `cache` '
@@ -965,24 +1021,26 @@ class DiskCache:
                 'AND `tag` IS ?',
                 (sk, tag)
             ).fetchone()
+            now: Time = current()
             if row:
                 (rowid, expire) = row
-                if expire is None or expire > current():
+                if expire is None or expire > now:
                     return False
                 sv, vf = self.store.dumps(value)
-                return self._update_row(sql, rowid, sv, vf, timeout, tag)
+                return self._update_row(sql, rowid, sv, vf, timeout, tag, now)
             sv, vf = self.store.dumps(value)
-            ok: bool = self._create_row(sql, sk, kf, sv, vf, timeout, tag)
+            ok: bool = self._create_row(sql, sk, kf, sv, vf, timeout, tag, now)
             if ok:
                 self._add_count(sql)
-                self.try_evict(sql)
+                self.try_evict(sql, now)
             return ok
 
-    def try_evict(self, sql) -> None:
+    def try_evict(self, sql: QY, now: Time = None) -> None:
         """ try to evict expired data """
         if len(self) < self.max_size:
             return
-        now: Time = current()
+        if now is None:
+            now = current()
         sql(
             'DELETE FROM `cache` '
             'WHERE `expire` IS NOT NULL '
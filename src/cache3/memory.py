@@ -7,14 +7,16 @@
 
 """
 
-import functools
-from collections import OrderedDict
+import heapq
+from collections import OrderedDict, Counter
 from contextlib import AbstractContextManager
 from threading import Lock
 from time import time as current
 from typing import Dict, Any, Iterable, Type, Optional, NoReturn, Tuple, Union, Callable, List
 
-from .util import Time, TG, Number, get_expire, empty, lazy, memoize
+from .util import (
+    Time, TG, Number, get_expire, empty, lazy, memoize, update_wrapper, Cache3Error
+)
 
 
 class NullContext(AbstractContextManager):
@@ -38,33 +40,126 @@ class NullContext(AbstractContextManager):
 LK: Type = Union[NullContext, Lock]
 SK: Type = Tuple[Any, TG]
 
+# Default max size of a cache (bucket)
+_default_max_size: int = 1 << 30
+# Default count of the items evicted at once
+_default_evict_size: int = 16
+# Default evict policy
+_default_evict_policy: str = 'lru'
+
 
 class MiniCache:
     """ A simple dictionary-based in-memory cache that supports automatic
     data elimination and does not support tag.
 
     Cache is built based on minicache, but cache is tag-supported.
+
+    Entries are kept in an ``OrderedDict`` from the oldest to the newest,
+    so both refreshing a key (``move_to_end``) and evicting the oldest one
+    (``popitem(last=False)``) are O(1).
     """
 
+    # Many buckets are created by ``Cache`` (one per tag), so instances don't
+    # carry a ``__dict__``. Subclasses adding attributes must extend ``__slots__``.
+    __slots__ = (
+        'name', 'max_size', 'evict_size', 'evict_policy',
+        '_lock', '_cache', '_expires', '_visits', '_evictor', '_on_hit', '_on_update',
+        '__weakref__',
+    )
+
     def __init__(self, 
                 name: str, 
-                max_size: int = 1 << 30, 
-                evict_size: int = 16, 
-                evict_policy: str = 'lru',
+                max_size: int = _default_max_size, 
+                evict_size: int = _default_evict_size, 
+                evict_policy: str = _default_evict_policy,
                 thread_safe: bool = True,
                 ) -> None:
+        if not isinstance(name, str):
+            raise TypeError(
+                f'name want str object but get {type(name)}'
+            )
+        self._check_config(max_size, evict_size, evict_policy)
         self.name: str = name
         self.max_size: int = max_size
         self.evict_size: int = evict_size
-        self.evict_policy: str = evict_policy
         self._lock: LK = Lock() if thread_safe else NullContext()
         self._cache: OrderedDict = OrderedDict()
-        self._expires: OrderedDict = OrderedDict()
+        # only the entries order matters, expires are looked up by key
+        self._expires: Dict[Any, Time] = {}
+        self._visits: Counter = Counter()
+        self.config_evict(evict_policy)
+
+    @classmethod
+    def _check_config(
+            cls,
+            max_size: int = _default_max_size,
+            evict_size: int = _default_evict_size,
+            evict_policy: str = _default_evict_policy,
+            thread_safe: bool = True,  # pylint: disable=unused-argument
+    ) -> None:
+        """ Check the configuration once, the attributes are plain slots.
+
+        Takes the same arguments as ``__init__`` (but ``name``), so ``Cache``,
+        whose buckets are created lazily, can check them at construction.
+        """
+        for attr, value in (('max_size', max_size), ('evict_size', evict_size)):
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise Cache3Error(
+                    f'{attr} must be a positive integer but get {value!r}'
+                )
+        cls._get_evictor(evict_policy)
+
+    @classmethod
+    def _get_evictor(cls, evict_policy: str) -> Callable[['MiniCache', int], List[Any]]:
+        """ Returns the evict function of the ``evict_policy`` """
+        evictor: Optional[Callable[['MiniCache', int], List[Any]]] = getattr(
+            cls, f'_{evict_policy}_evict', None
+        )
+        if not callable(evictor):
+            raise Cache3Error(
+                f'no register evict policy named {evict_policy!r}'
+            )
+        return evictor
+
+    def config_evict(self, evict_policy: str) -> bool:
+        """ Set the evict policy, the evictor is resolved here once instead
+        of being looked up on every eviction.
+
+        The plain function is stored (not the bound method) so that the
+        instance doesn't reference itself and is freed without the cyclic GC.
+        """
+        evictor: Callable[['MiniCache', int], List[Any]] = self._get_evictor(evict_policy)
+        self.evict_policy: str = evict_policy
+        self._evictor: Callable[['MiniCache', int], List[Any]] = evictor
+        # hooks run on a hit and on an overwrite of an existing key, they
+        # close over the containers only (not ``self``), None means nothing to do
+        self._visits.clear()
+        self._on_hit: Optional[Callable[[Any], None]] = None
+        self._on_update: Optional[Callable[[Any], None]] = None
+        if evict_policy == 'lru':
+            self._on_hit = self._on_update = self._cache.move_to_end
+        elif evict_policy == 'lfu':
+            visits: Counter = self._visits
+
+            def count(key: Any) -> None:
+                visits[key] += 1
+            self._on_hit = count
+        return True
 
     def set(self, key: Any, value: Any, timeout: Time = None) -> bool:
         with self._lock:
             self._set(key, value, get_expire(timeout))
             return True
+
+    def set_many(self, mapping: Dict[Any, Any], timeout: Time = None) -> bool:
+        """ Batch version of ``set``, the lock is acquired and the expire
+        is computed only once for the whole group of items.
+        """
+        with self._lock:
+            expire: Time = get_expire(timeout)
+            for key, value in mapping.items():
+                self._set(key, value, expire)
+            return True
     
     def get(self, key: Any, default: Any = None) -> Any:
         
@@ -72,23 +167,39 @@ class MiniCache:
             if self._has_expired(key):
                 self._del(key)
                 return default
-            return self._cache.get(key, default)
+            if self._on_hit is not None:
+                self._on_hit(key)
+            return self._cache[key]
 
     def get_many(self, keys: List[Any]) -> dict:
-        res: dict = {} 
+        """ Batch version of ``get``, the lock is acquired and the clock is
+        read only once for the whole group of keys.
+        """
+        res: dict = {}
         with self._lock:
+            now: Time = current()
+            expires: Dict[Any, Time] = self._expires
+            on_hit: Optional[Callable[[Any], None]] = self._on_hit
             for key in keys:
-                if self._has_expired(key):
+                # a single lookup tells missing, expired and alive keys apart
+                expire: Time = expires.get(key, empty)
+                if expire is empty:
+                    continue
+                if expire is not None and expire < now:
                     self._del(key)
-                else:
-                    res[key] = self._cache[key]
+                    continue
+                if on_hit is not None:
+                    on_hit(key)
+                res[key] = self._cache[key]
         return res
 
     def ex_set(self, key: Any, value: Any, timeout: Time = None) -> bool:
 
         with self._lock:
-            if self._has_expired(key):
-                self._set(key, value, get_expire(timeout))
+            now: Time = current()
+            # missing keys are seen as expired, one lookup answers both
+            if self._has_expired(key, now):
+                self._set(key, value, get_expire(timeout, now))
                 return True
             return False
     
@@ -101,6 +212,7 @@ class MiniCache:
         with self._lock:
             self._cache.clear()
             self._expires.clear()
+            self._visits.clear()
         return True
 
     def memoize(self, timeout: Time = None) -> Callable[[TG, Time], Callable]:
@@ -113,15 +225,23 @@ class MiniCache:
                 raise TypeError(
                     'The `memoize` decorator should be called with a `timeout` parameter.'
                 )
-            @functools.wraps(func)
+            # keyed on the function itself, closures sharing a qualname differ
+            name: Callable = func
+            # bound once here, the wrapper reads them as closure variables
+            # instead of attribute and global lookups on every call
+            get: Callable = self.get
+            set_: Callable = self.set
+            missing: Any = empty
+
             def wrapper(*args, **kwargs) -> Any:
                 """Wrapper for callable to cache arguments and return values."""
-                value: Any = self.get(func.__name__, empty)
-                if value is empty:
+                key: Tuple[Any, ...] = (name, args, tuple(sorted(kwargs.items())))
+                value: Any = get(key, missing)
+                if value is missing:
                     value: Any = func(*args, **kwargs)
-                    self.set(func.__name__, value, timeout)
+                    set_(key, value, timeout)
                 return value
-            return wrapper
+            return update_wrapper(wrapper, func)
         return decorator
 
     def incr(self, key: Any, delta: Number = 1) -> Number:
@@ -139,7 +259,8 @@ class MiniCache:
                 )
             value += delta
             self._cache[key] = value
-            self._cache.move_to_end(key, last=False)
+            if self._on_hit is not None:
+                self._on_hit(key)
         return value
 
     def decr(self, key: Any, delta: Number = 1) -> Number:
@@ -167,6 +288,7 @@ class MiniCache:
                     return default
                 raise KeyError(f'key {key!r} not found in cache')
             del self._expires[key]
+            self._visits.pop(key, None)
             return self._cache.pop(key)
 
     def ttl(self, key: Any) -> Time:
@@ -197,30 +319,65 @@ class MiniCache:
             'ttl': expire if expire is None or expire == -1 else expire - current()
         }
 
+    # The iterations run over a snapshot taken under the lock, since a hit
+    # reorders ``_cache`` (lru), and are ordered from the newest to the oldest.
+
     def keys(self) -> Iterable[Any]:
-        return iter(self._cache)
+        with self._lock:
+            return iter(list(reversed(self._cache)))
 
     def values(self) -> Iterable[Any]:
-        return self._cache.values()
+        with self._lock:
+            return list(reversed(self._cache.values()))
 
     def items(self) -> Iterable[Tuple[Any, ...]]:
-        return self._cache.items()
+        with self._lock:
+            return list(reversed(self._cache.items()))
 
     def _has_expired(self, key: Any, now: Time = None) -> bool:
         exp: Time = self._expires.get(key, -1)
-        return exp is not None and exp < (now or current())
+        if exp is None:
+            return False
+        return exp < (current() if now is None else now)
 
     def _set(self, key: Any, value: Any, expire: Time) -> None:
-        self._cache[key] = value
-        self._cache.move_to_end(key, last=False)
+        cache: OrderedDict = self._cache
+        if key in cache:
+            if self._on_update is not None:
+                self._on_update(key)
+        elif len(cache) >= self.max_size:
+            # make room before inserting, so the new key can't be evicted at once
+            self._evict()
+        # new keys are appended at the end, no need to move them
+        cache[key] = value
         self._expires[key] = expire
 
     def _del(self, key: Any) -> None:
-        try:
-            del self._cache[key]
+        self._cache.pop(key, None)
+        self._expires.pop(key, None)
+        self._visits.pop(key, None)
+
+    def _evict(self) -> None:
+        """ Evict ``evict_size`` items by the configured evict policy """
+        for key in self._evictor(self, min(self.evict_size, len(self._cache))):
             del self._expires[key]
-        except KeyError:
-            ...
+            self._visits.pop(key, None)
+
+    def _lru_evict(self, count: int) -> List[Any]:
+        # hit keys have been moved to the end, the head is the least recently used
+        return [self._cache.popitem(last=False)[0] for _ in range(count)]
+
+    def _fifo_evict(self, count: int) -> List[Any]:
+        # hit keys are never moved, the head is the first in
+        return [self._cache.popitem(last=False)[0] for _ in range(count)]
+
+    def _lfu_evict(self, count: int) -> List[Any]:
+        # only hit keys are counted, the others are 0 (``Counter.__missing__``),
+        # ties are broken by the insertion order
+        keys: List[Any] = heapq.nsmallest(count, self._cache, key=self._visits.__getitem__)
+        for key in keys:
+            del self._cache[key]
+        return keys
     
     def __len__(self) -> int:
         return len(self._cache)
@@ -254,6 +411,9 @@ class Cache:
     
     def __init__(self, name: str, *args, **kwargs) -> None:
         self.name: str = name
+        # the buckets are created lazily, check their configuration now
+        # instead of on the first write
+        MiniCache._check_config(*args, **kwargs)  # pylint: disable=protected-access
         def _factory() -> _Caches:
             return _Caches(name, *args, **kwargs)
         self._factory = _factory
@@ -263,6 +423,10 @@ class Cache:
         cache = self._caches[tag]
         return cache.set(key, value, timeout)
     
+    def set_many(self, mapping: Dict[Any, Any], timeout: Time = None, tag: TG = None) -> bool:
+        cache = self._caches[tag]
+        return cache.set_many(mapping, timeout)
+
     def get(self, key: Any, default: Any = None, tag: TG = None) -> Any:
         cache = self._caches[tag]
         return cache.get(key, default)
@@ -7,10 +7,9 @@
 Tools functions or classes for cache3
 """
 
-import functools
 import operator
 from time import time as current
-from typing import Any, NoReturn, Optional, Callable, Type, Union
+from typing import Any, NoReturn, Optional, Callable, Type, Union, Tuple
 
 # Compatible with multiple types.
 empty: Any = type('empty', (), {
@@ -34,7 +33,9 @@ def get_expire(timeout: Time, now: Time = None) -> Time:
     """ Returns a timestamp representing the timeout time """
     if timeout is None:
         return None
-    return (now or current()) + timeout
+    if now is None:
+        now = current()
+    return now + timeout
 
 
 # pylint: disable=invalid-name
@@ -155,9 +156,29 @@ def lazy(factory: Callable) -> Callable:
     return wrapper
 
 
+def update_wrapper(wrapper: Callable, wrapped: Callable) -> Callable:
+    """ A minimal ``functools.update_wrapper``, only copies the attributes
+    that matter to a memoized function. """
+    wrapper.__module__ = wrapped.__module__
+    wrapper.__name__ = wrapped.__name__
+    wrapper.__qualname__ = wrapped.__qualname__
+    wrapper.__doc__ = wrapped.__doc__
+    wrapper.__wrapped__ = wrapped
+    return wrapper
+
+
 def memoize(self: Any, timeout: Time = 24 * 60 * 60, tag: TG = None) -> Any:
     """ The cache is decorated with the return value of the function,
-    and the timeout is available. """
+    and the timeout is available.
+
+    The return values are cached by the function and its arguments, so the
+    arguments must be hashable (and picklable for the disk-based cache).
+
+    In-memory caches key on the function object itself. Persistent caches
+    are shared between processes, so they key on the function dotted name
+    instead, distinct functions sharing a qualified name (e.g. closures
+    created by the same factory) share their entries there.
+    """
 
     def decorator(func: Optional[Callable] = None) -> Callable[[Callable[[Any], Any]], Any]:
         """ Decorator created by memoize() for callable `func`."""
@@ -166,15 +187,25 @@ def memoize(self: Any, timeout: Time = 24 * 60 * 60, tag: TG = None) -> Any:
                 'The `memoize` decorator should be called with a `timeout` parameter.'
             )
 
-        @functools.wraps(func)
+        name: Any = (
+            f'{func.__module__}.{func.__qualname__}'
+            if getattr(self, 'persistent', False) else func
+        )
+        # bound once here, the wrapper reads them as closure variables
+        # instead of attribute and global lookups on every call
+        get: Callable = self.get
+        set_: Callable = self.set
+        missing: Any = empty
+
         def wrapper(*args, **kwargs) -> Any:
             """Wrapper for callable to cache arguments and return values."""
-            value: Any = self.get(func.__name__, empty, tag)
-            if value is empty:
+            key: Tuple[Any, ...] = (name, args, tuple(sorted(kwargs.items())))
+            value: Any = get(key, missing, tag)
+            if value is missing:
                 value: Any = func(*args, **kwargs)
-                self.set(func.__name__, value, timeout, tag)
+                set_(key, value, timeout, tag)
             return value
 
-        return wrapper
+        return update_wrapper(wrapper, func)
 
     return decorator
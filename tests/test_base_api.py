@@ -82,6 +82,42 @@ class TestGeneralCacheApi:
             for k, v in cache.get_many(test_set).items():
                 assert k == v[::-1]
 
+    def test_set_many(self):
+        mapping = {key: key[::-1] for key in rand_strings(10)}
+        for cache in self.caches:
+            cache.set('existed', 'old')
+            assert cache.set_many({**mapping, 'existed': 'new'})
+            assert len(cache) == len(mapping) + 1
+            assert cache.get('existed') == 'new'
+            assert cache.get_many(list(mapping)) == mapping
+
+            assert cache.set_many({'expired': 'value'}, timeout=-1)
+            assert not cache.has_key('expired')
+
+        # the batch can't grow the cache beyond max_size
+        max_size, evict_size = 10, 2
+        disk_cache = DiskCache(
+            self.disk_cache.directory, f'{rand_string()}.sqlite3',
+            max_size=max_size, evict_size=evict_size,
+        )
+        small_caches = [
+            MiniCache(rand_string(), max_size=max_size, evict_size=evict_size),
+            Cache(rand_string(), max_size=max_size, evict_size=evict_size),
+            disk_cache,
+        ]
+        mapping = {key: key for key in range(100)}
+        for cache in small_caches:
+            assert cache.set_many(mapping)
+            assert len(cache) <= max_size
+        assert disk_cache.length <= max_size
+        disk_cache.sqlite.close()
+
+    def test_get_many_expired(self):
+        for cache in self.caches:
+            cache.set('alive', 'value')
+            cache.set('expired', 'value', timeout=-1)
+            assert cache.get_many(['alive', 'expired', 'not-existed']) == {'alive': 'value'}
+
     def test_clear(self):
         for cache in self.caches:
             cache.clear()
@@ -202,6 +238,39 @@ class TestGeneralCacheApi:
             time.sleep(0.11)
             assert cal() == 3
 
+    def test_memoize_arguments(self):
+
+        for cache in self.caches:
+            calls = []
+            @cache.memoize()
+            def add(a, b=0):
+                calls.append((a, b))
+                return a + b
+
+            assert add(1) == 1
+            assert add(1, 2) == 3
+            assert add(1, b=2) == 3
+            assert add(2, b=1) == 3
+            assert add(1) == 1
+            assert add(1, b=2) == 3
+            assert calls == [(1, 0), (1, 2), (1, 2), (2, 1)]
+            assert add.__name__ == 'add'
+            assert add.__wrapped__(1, 1) == 2
+
+    def test_memoize_closures(self):
+
+        def make(n):
+            def add(x):
+                return x + n
+            return add
+
+        for cache in (self.mini_cache, self.mem_cache):
+            add1 = cache.memoize()(make(1))
+            add2 = cache.memoize()(make(2))
+            assert add1(0) == 1
+            assert add2(0) == 2
+            assert add1(0) == 1
+
     def test_failed_memoize(self):
 
         for cache in self.caches:
@@ -4,6 +4,7 @@
 # author: clarkmonkey@163.com
 
 import pickle
+import warnings
 from pathlib import Path
 from shutil import rmtree
 
@@ -149,6 +150,10 @@ class TestPickleStore:
         assert store.delete(v) == True
         with warns(Cache3Warning):
             assert store.loads(v, f) is None
+        # only warned once
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            assert store.loads(v, f) is None
         
         # test delete
         assert store.delete(v) == False
@@ -209,6 +214,15 @@ class TestDiskCache:
     def test_str(self):
         assert str(self.cache).startswith('<DiskCache: ')
 
+    def test_equal_keys(self):
+        # equal keys with different pickled bytes are different keys
+        self.cache.set((True,), 'true')
+        assert self.cache.get((1,)) is None
+        assert self.cache.get((True,)) == 'true'
+        self.cache.set((1,), 'one')
+        assert self.cache.get((1,)) == 'one'
+        assert self.cache.get((True,)) == 'true'
+
     def test_inspect(self):
         name, value, tag = 'name', 'value', 'tag'
         # not existed key
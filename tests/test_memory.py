@@ -3,9 +3,12 @@
 # date: 2023/2/15
 # author: clarkmonkey@163.com
 
+import gc
 import time
+import weakref
 import pytest
 from cache3 import MiniCache, Cache
+from cache3.util import Cache3Error
 from utils import rand_string, rand_strings
 
 
@@ -65,6 +68,99 @@ class TestMiniCache(MemoizeMixin):
         self.cache['name'] = None
         assert str(self.cache) == '<MiniCache length:1>'
 
+    @pytest.mark.parametrize('policy, evicted', [
+        ('lru', 'c'),
+        ('fifo', 'a'),
+        ('lfu', 'b'),
+    ])
+    def test_evict(self, policy, evicted):
+        cache = MiniCache(rand_string(), max_size=3, evict_size=1, evict_policy=policy)
+        for key in 'abc':
+            cache[key] = key
+        for key in 'ccbaa':
+            assert cache[key] == key
+        cache['d'] = 'd'
+        assert len(cache) == 3
+        assert evicted not in cache
+        assert set(cache.keys()) == set('abcd') - {evicted}
+
+    @pytest.mark.parametrize('policy, evicted', [
+        ('lru', 'c'),
+        ('fifo', 'a'),
+        ('lfu', 'b'),
+    ])
+    def test_evict_after_update(self, policy, evicted):
+        cache = MiniCache(rand_string(), max_size=3, evict_size=1, evict_policy=policy)
+        for key in 'abc':
+            cache[key] = key
+        for key in 'aacb':
+            assert cache[key] == key
+        # updating keeps the fifo order and the lfu count
+        cache['a'] = 'A'
+        cache['d'] = 'd'
+        assert evicted not in cache
+        assert set(cache.keys()) == set('abcd') - {evicted}
+
+    @pytest.mark.parametrize('policy', ['lru', 'lfu', 'fifo'])
+    def test_iterate_while_get(self, policy):
+        cache = MiniCache(rand_string(), evict_policy=policy)
+        for key in 'abc':
+            cache[key] = key
+        assert [cache[key] for key in cache] == ['c', 'b', 'a']
+        for key, value in cache.items():
+            assert cache.get(key) == value
+        assert list(cache.values()) == [cache[key] for key in cache.keys()]
+
+    def test_weakref(self):
+        cache = MiniCache(rand_string())
+        ref = weakref.ref(cache)
+        assert ref() is cache
+        assert not hasattr(cache, '__dict__')
+
+    @pytest.mark.parametrize('policy', ['lru', 'lfu', 'fifo'])
+    def test_no_reference_cycle(self, policy):
+        gc.disable()
+        try:
+            cache = MiniCache(rand_string(), evict_policy=policy)
+            ref = weakref.ref(cache)
+            del cache
+            assert ref() is None
+        finally:
+            gc.enable()
+
+    def test_invalid_config(self):
+        with raises(TypeError, match='name want str object but get .*'):
+            MiniCache(1)
+        with raises(Cache3Error, match='max_size must be a positive integer but get 0'):
+            MiniCache(rand_string(), max_size=0)
+        with raises(Cache3Error, match='evict_size must be a positive integer but get 0'):
+            MiniCache(rand_string(), evict_size=0)
+        with raises(Cache3Error, match='max_size must be a positive integer but get True'):
+            MiniCache(rand_string(), max_size=True)
+
+        # the tag-supported cache validates its buckets configuration at once
+        with raises(Cache3Error, match='max_size must be a positive integer but get 0'):
+            Cache(rand_string(), max_size=0)
+        with raises(Cache3Error, match='evict_size must be a positive integer but get False'):
+            Cache(rand_string(), 10, False)
+        with raises(Cache3Error, match="no register evict policy named 'not-existed'"):
+            Cache(rand_string(), evict_policy='not-existed')
+        # the buckets names are always str
+        assert Cache(1).set('key', 'value')
+
+    def test_config_evict(self):
+        cache = MiniCache(rand_string(), max_size=2, evict_size=1)
+        assert cache.evict_policy == 'lru'
+        assert cache.config_evict('fifo')
+        assert cache.evict_policy == 'fifo'
+
+        not_existed_evict = 'not-existed-evict'
+        with raises(Cache3Error, match=f'no register evict policy named {not_existed_evict!r}'):
+            cache.config_evict(not_existed_evict)
+        with raises(Cache3Error, match=f'no register evict policy named {not_existed_evict!r}'):
+            MiniCache(rand_string(), evict_policy=not_existed_evict)
+        assert cache.evict_policy == 'fifo'
+
 class TestCache(MemoizeMixin):
     
     CacheClass = Cache